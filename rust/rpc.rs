@@ -27,6 +27,10 @@ use serde_json::value::RawValue;
 use crate::stream_broadcast::{StreamBroadcast, StreamSender};
 use crate::{Error, StreamReceiver};
 
+/// Size of the read buffer, and the point at which queued outgoing messages
+/// stop being coalesced into a single write.
+const IO_BUFFER_SIZE: usize = 64 * 1024;
+
 pub struct RpcConnection<Local: Side, Remote: Side> {
     outgoing_tx: UnboundedSender<OutgoingMessage<Local, Remote>>,
     pending_responses: Arc<Mutex<HashMap<i32, PendingResponse>>>,
@@ -111,7 +115,7 @@ where
         params: Option<Remote::InRequest>,
     ) -> impl Future<Output = Result<Out, Error>> {
         let (tx, rx) = oneshot::channel();
-        let id = self.next_id.fetch_add(1, Ordering::SeqCst);
+        let id = self.next_id.fetch_add(1, Ordering::Relaxed);
         self.pending_responses.lock().insert(
             id,
             PendingResponse {
@@ -157,30 +161,55 @@ where
         broadcast: StreamSender,
     ) -> Result<()> {
         // TODO: Create nicer abstraction for broadcast
-        let mut input_reader = BufReader::new(incoming_bytes);
+        // Messages often carry file contents or tool output, so read in larger
+        // chunks than BufReader's 8 KiB default to cut down on read calls.
+        let mut input_reader = BufReader::with_capacity(IO_BUFFER_SIZE, incoming_bytes);
         let mut outgoing_line = Vec::new();
-        let mut incoming_line = String::new();
+        let mut outgoing_batch = Vec::new();
+        let mut incoming_line = Vec::new();
         loop {
             select_biased! {
                 message = outgoing_rx.next() => {
                     if let Some(message) = message {
                         outgoing_line.clear();
-                        serde_json::to_writer(&mut outgoing_line, &JsonRpcMessage::wrap(&message)).map_err(Error::into_internal_error)?;
-                        log::trace!("send: {}", String::from_utf8_lossy(&outgoing_line));
-                        outgoing_line.push(b'\n');
+                        // Pick up any messages that are already queued so a burst
+                        // (e.g. streamed session updates) goes out in one write.
+                        let mut next = Some(message);
+                        let mut result = Ok(());
+                        while let Some(message) = next {
+                            let start = outgoing_line.len();
+                            if let Err(err) = serde_json::to_writer(&mut outgoing_line, &JsonRpcMessage::wrap(&message)) {
+                                outgoing_line.truncate(start);
+                                result = Err(Error::into_internal_error(err));
+                                break;
+                            }
+                            log::trace!("send: {}", String::from_utf8_lossy(&outgoing_line[start..]));
+                            outgoing_line.push(b'\n');
+                            outgoing_batch.push(message);
+                            if outgoing_line.len() >= IO_BUFFER_SIZE {
+                                break;
+                            }
+                            next = outgoing_rx.try_next().ok().flatten();
+                        }
+                        // Send whatever was serialized before surfacing an error.
                         outgoing_bytes.write_all(&outgoing_line).await.ok();
-                        broadcast.outgoing(&message);
+                        for message in outgoing_batch.drain(..) {
+                            broadcast.outgoing(&message);
+                        }
+                        // Don't keep the capacity of an unusually large message around.
+                        outgoing_line.shrink_to(IO_BUFFER_SIZE);
+                        result?;
                     } else {
                         break;
                     }
                 }
-                bytes_read = input_reader.read_line(&mut incoming_line).fuse() => {
+                bytes_read = input_reader.read_until(b'\n', &mut incoming_line).fuse() => {
                     if bytes_read.map_err(Error::into_internal_error)? == 0 {
                         break
                     }
-                    log::trace!("recv: {}", &incoming_line);
+                    log::trace!("recv: {}", String::from_utf8_lossy(&incoming_line));
 
-                    match serde_json::from_str::<RawIncomingMessage>(&incoming_line) {
+                    match serde_json::from_slice::<RawIncomingMessage>(&incoming_line) {
                         Ok(message) => {
                             if let Some(id) = message.id {
                                 if let Some(method) = message.method {
@@ -218,7 +247,7 @@ where
                                     } else {
                                         broadcast.incoming_response(id, Ok(None));
 
-                                        let result = (pending_response.deserialize)(&RawValue::from_string("null".into()).unwrap());
+                                        let result = (pending_response.deserialize)(RawValue::NULL);
                                         pending_response.respond.send(result).ok();
                                     }
                                 } else {
@@ -240,7 +269,7 @@ where
                             }
                         }
                         Err(error) => {
-                            log::error!("failed to parse incoming message: {error}. Raw: {incoming_line}");
+                            log::error!("failed to parse incoming message: {error}. Raw: {}", String::from_utf8_lossy(&incoming_line));
                         }
                     }
                     incoming_line.clear();
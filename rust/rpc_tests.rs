@@ -11,6 +11,7 @@ struct TestClient {
     written_files: Arc<Mutex<Vec<(std::path::PathBuf, String)>>>,
     session_notifications: Arc<Mutex<Vec<SessionNotification>>>,
     extension_notifications: Arc<Mutex<Vec<(String, ExtNotification)>>>,
+    notified: Arc<tokio::sync::Notify>,
 }
 
 impl TestClient {
@@ -21,6 +22,7 @@ impl TestClient {
             written_files: Arc::new(Mutex::new(Vec::new())),
             session_notifications: Arc::new(Mutex::new(Vec::new())),
             extension_notifications: Arc::new(Mutex::new(Vec::new())),
+            notified: Arc::new(tokio::sync::Notify::new()),
         }
     }
 
@@ -85,6 +87,7 @@ impl Client for TestClient {
 
     async fn session_notification(&self, args: SessionNotification) -> Result<(), Error> {
         self.session_notifications.lock().unwrap().push(args);
+        self.notified.notify_one();
         Ok(())
     }
 
@@ -138,6 +141,7 @@ impl Client for TestClient {
             .lock()
             .unwrap()
             .push((args.method.to_string(), args));
+        self.notified.notify_one();
         Ok(())
     }
 }
@@ -148,6 +152,7 @@ struct TestAgent {
     prompts_received: Arc<Mutex<Vec<PromptReceived>>>,
     cancellations_received: Arc<Mutex<Vec<SessionId>>>,
     extension_notifications: Arc<Mutex<Vec<(String, ExtNotification)>>>,
+    notified: Arc<tokio::sync::Notify>,
 }
 
 type PromptReceived = (SessionId, Vec<ContentBlock>);
@@ -159,6 +164,7 @@ impl TestAgent {
             prompts_received: Arc::new(Mutex::new(Vec::new())),
             cancellations_received: Arc::new(Mutex::new(Vec::new())),
             extension_notifications: Arc::new(Mutex::new(Vec::new())),
+            notified: Arc::new(tokio::sync::Notify::new()),
         }
     }
 }
@@ -228,6 +234,7 @@ impl Agent for TestAgent {
             .lock()
             .unwrap()
             .push(args.session_id);
+        self.notified.notify_one();
         Ok(())
     }
 
@@ -258,10 +265,22 @@ impl Agent for TestAgent {
             .lock()
             .unwrap()
             .push((args.method.to_string(), args));
+        self.notified.notify_one();
         Ok(())
     }
 }
 
+// Helper function to wait until a notification handler has recorded what a test expects
+async fn wait_until(notified: &tokio::sync::Notify, condition: impl Fn() -> bool) {
+    tokio::time::timeout(std::time::Duration::from_secs(5), async {
+        while !condition() {
+            notified.notified().await;
+        }
+    })
+    .await
+    .expect("timed out waiting for notifications");
+}
+
 // Helper function to create a bidirectional connection
 fn create_connection_pair(
     client: &TestClient,
@@ -428,7 +447,10 @@ async fn test_session_notifications() {
                 .await
                 .expect("session_notification failed");
 
-            tokio::task::yield_now().await;
+            wait_until(&client.notified, || {
+                client.session_notifications.lock().unwrap().len() == 2
+            })
+            .await;
 
             let notifications = client.session_notifications.lock().unwrap();
             assert_eq!(notifications.len(), 2);
@@ -438,6 +460,55 @@ async fn test_session_notifications() {
         .await;
 }
 
+#[tokio::test]
+async fn test_queued_notifications_arrive_in_order() {
+    let local_set = tokio::task::LocalSet::new();
+    local_set
+        .run_until(async {
+            let client = TestClient::new();
+            let agent = TestAgent::new();
+
+            let (_agent_conn, client_conn) = create_connection_pair(&client, &agent);
+
+            let session_id = SessionId(Arc::from("test-session"));
+            // Queue enough notifications back to back that they are coalesced
+            // into more than one write
+            let padding = "x".repeat(8 * 1024);
+            for i in 0..20 {
+                client_conn
+                    .session_notification(SessionNotification {
+                        session_id: session_id.clone(),
+                        update: SessionUpdate::AgentMessageChunk {
+                            content: ContentBlock::Text(TextContent {
+                                annotations: None,
+                                text: format!("chunk {i} {padding}"),
+                                meta: None,
+                            }),
+                        },
+                        meta: None,
+                    })
+                    .await
+                    .expect("session_notification failed");
+            }
+
+            wait_until(&client.notified, || {
+                client.session_notifications.lock().unwrap().len() == 20
+            })
+            .await;
+
+            let notifications = client.session_notifications.lock().unwrap();
+            for (i, notification) in notifications.iter().enumerate() {
+                match &notification.update {
+                    SessionUpdate::AgentMessageChunk {
+                        content: ContentBlock::Text(text),
+                    } => assert_eq!(text.text, format!("chunk {i} {padding}")),
+                    update => panic!("unexpected update: {update:?}"),
+                }
+            }
+        })
+        .await;
+}
+
 #[tokio::test]
 async fn test_cancel_notification() {
     let local_set = tokio::task::LocalSet::new();
@@ -458,7 +529,10 @@ async fn test_cancel_notification() {
                 .await
                 .expect("cancel failed");
 
-            tokio::task::yield_now().await;
+            wait_until(&agent.notified, || {
+                agent.cancellations_received.lock().unwrap().len() == 1
+            })
+            .await;
 
             let cancelled = agent.cancellations_received.lock().unwrap();
             assert_eq!(cancelled.len(), 1);
@@ -695,9 +769,10 @@ async fn test_full_conversation_flow() {
                 .await
                 .expect("session_notification failed");
 
-            for _ in 0..10 {
-                tokio::task::yield_now().await;
-            }
+            wait_until(&client.notified, || {
+                client.session_notifications.lock().unwrap().len() >= 5
+            })
+            .await;
 
             // Verify we received all the updates
             let updates = client.session_notifications.lock().unwrap();
@@ -872,8 +947,15 @@ async fn test_extension_methods_and_notifications() {
                 .await
                 .unwrap();
 
-            // Yield to allow notifications to be processed
-            tokio::task::yield_now().await;
+            // Wait for both notifications to be processed
+            wait_until(&client_ref.notified, || {
+                client_ref.extension_notifications.lock().unwrap().len() == 1
+            })
+            .await;
+            wait_until(&agent_ref.notified, || {
+                agent_ref.extension_notifications.lock().unwrap().len() == 1
+            })
+            .await;
 
             // Verify client received the notification
             let client_notifications = client_ref.extension_notifications.lock().unwrap();
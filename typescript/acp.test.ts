@@ -1,4 +1,4 @@
-import { describe, it, expect, beforeEach } from "vitest";
+import { describe, it, expect, beforeEach, vi } from "vitest";
 import {
   Agent,
   ClientSideConnection,
@@ -24,6 +24,7 @@ import {
   SessionNotification,
   PROTOCOL_VERSION,
   ndJsonStream,
+  AnyMessage,
 } from "./acp.js";
 
 describe("Connection", () => {
@@ -35,6 +36,23 @@ describe("Connection", () => {
     agentToClient = new TransformStream();
   });
 
+  function connect(
+    toClient: (agent: Agent) => Client,
+    toAgent: (conn: AgentSideConnection) => Agent,
+  ) {
+    const agentConnection = new ClientSideConnection(
+      toClient,
+      ndJsonStream(clientToAgent.writable, agentToClient.readable),
+    );
+
+    const clientConnection = new AgentSideConnection(
+      toAgent,
+      ndJsonStream(agentToClient.writable, clientToAgent.readable),
+    );
+
+    return { agentConnection, clientConnection };
+  }
+
   it("handles errors in bidirectional communication", async () => {
     // Create client that throws errors
     class TestClient implements Client {
@@ -81,14 +99,9 @@ describe("Connection", () => {
     }
 
     // Set up connections
-    const agentConnection = new ClientSideConnection(
+    const { agentConnection, clientConnection } = connect(
       () => new TestClient(),
-      ndJsonStream(clientToAgent.writable, agentToClient.readable),
-    );
-
-    const clientConnection = new AgentSideConnection(
       () => new TestAgent(),
-      ndJsonStream(agentToClient.writable, clientToAgent.readable),
     );
 
     // Test error handling in client->agent direction
@@ -111,6 +124,12 @@ describe("Connection", () => {
 
   it("handles concurrent requests", async () => {
     let requestCount = 0;
+    // Hold every write until all three have arrived, which can only happen
+    // if the requests are handled concurrently.
+    let releaseWrites!: () => void;
+    const allWritesReceived = new Promise<void>((resolve) => {
+      releaseWrites = resolve;
+    });
 
     // Create client
     class TestClient implements Client {
@@ -119,7 +138,10 @@ describe("Connection", () => {
       ): Promise<WriteTextFileResponse> {
         requestCount++;
         const currentCount = requestCount;
-        await new Promise((resolve) => setTimeout(resolve, 40));
+        if (requestCount === 3) {
+          releaseWrites();
+        }
+        await allWritesReceived;
         console.log(`Write request ${currentCount} completed`);
         return {};
       }
@@ -173,14 +195,9 @@ describe("Connection", () => {
     }
 
     // Set up connections
-    const agentConnection = new ClientSideConnection(
+    const { agentConnection, clientConnection } = connect(
       () => new TestClient(),
-      ndJsonStream(clientToAgent.writable, agentToClient.readable),
-    );
-
-    const clientConnection = new AgentSideConnection(
       () => new TestAgent(),
-      ndJsonStream(agentToClient.writable, clientToAgent.readable),
     );
 
     // Send multiple concurrent requests
@@ -281,14 +298,9 @@ describe("Connection", () => {
     }
 
     // Set up connections
-    const agentConnection = new ClientSideConnection(
+    const { agentConnection, clientConnection } = connect(
       () => new TestClient(),
-      ndJsonStream(clientToAgent.writable, agentToClient.readable),
-    );
-
-    const clientConnection = new AgentSideConnection(
       () => new TestAgent(),
-      ndJsonStream(agentToClient.writable, clientToAgent.readable),
     );
 
     // Send requests in specific order
@@ -347,6 +359,14 @@ describe("Connection", () => {
 
   it("handles notifications correctly", async () => {
     const notificationLog: string[] = [];
+    let agentMessageReceived!: () => void;
+    const agentMessage = new Promise<void>((resolve) => {
+      agentMessageReceived = resolve;
+    });
+    let cancelReceived!: () => void;
+    const cancel = new Promise<void>((resolve) => {
+      cancelReceived = resolve;
+    });
 
     // Create client
     class TestClient implements Client {
@@ -379,6 +399,7 @@ describe("Connection", () => {
           notificationLog.push(
             `agent message: ${(notification.update.content as any).text}`,
           );
+          agentMessageReceived();
         }
       }
     }
@@ -408,6 +429,7 @@ describe("Connection", () => {
       }
       async cancel(params: CancelNotification): Promise<void> {
         notificationLog.push(`cancelled: ${params.sessionId}`);
+        cancelReceived();
       }
     }
 
@@ -416,14 +438,9 @@ describe("Connection", () => {
     const testAgent = () => new TestAgent();
 
     // Set up connections
-    const agentConnection = new ClientSideConnection(
+    const { agentConnection, clientConnection } = connect(
       testClient,
-      ndJsonStream(clientToAgent.writable, agentToClient.readable),
-    );
-
-    const clientConnection = new AgentSideConnection(
       testAgent,
-      ndJsonStream(agentToClient.writable, clientToAgent.readable),
     );
 
     // Send notifications
@@ -442,8 +459,8 @@ describe("Connection", () => {
       sessionId: "test-session",
     });
 
-    // Wait a bit for async handlers
-    await new Promise((resolve) => setTimeout(resolve, 50));
+    // Wait for both handlers to run
+    await Promise.all([agentMessage, cancel]);
 
     // Verify notifications were received
     expect(notificationLog).toContain("agent message: Hello from agent");
@@ -511,14 +528,9 @@ describe("Connection", () => {
     }
 
     // Set up connections
-    const agentConnection = new ClientSideConnection(
+    const { agentConnection, clientConnection } = connect(
       () => new TestClient(),
-      ndJsonStream(clientToAgent.writable, agentToClient.readable),
-    );
-
-    const clientConnection = new AgentSideConnection(
       () => new TestAgent(),
-      ndJsonStream(agentToClient.writable, clientToAgent.readable),
     );
 
     // Test initialize request
@@ -540,6 +552,14 @@ describe("Connection", () => {
 
   it("handles extension methods and notifications", async () => {
     const extensionLog: string[] = [];
+    let clientNotified!: () => void;
+    const clientNotification = new Promise<void>((resolve) => {
+      clientNotified = resolve;
+    });
+    let agentNotified!: () => void;
+    const agentNotification = new Promise<void>((resolve) => {
+      agentNotified = resolve;
+    });
 
     // Create client with extension method support
     class TestClient implements Client {
@@ -580,6 +600,7 @@ describe("Connection", () => {
         params: Record<string, unknown>,
       ): Promise<void> {
         extensionLog.push(`client extNotification: ${method}`);
+        clientNotified();
       }
     }
 
@@ -617,18 +638,14 @@ describe("Connection", () => {
         params: Record<string, unknown>,
       ): Promise<void> {
         extensionLog.push(`agent extNotification: ${method}`);
+        agentNotified();
       }
     }
 
     // Set up connections
-    const agentConnection = new ClientSideConnection(
+    const { agentConnection, clientConnection } = connect(
       () => new TestClient(),
-      ndJsonStream(clientToAgent.writable, agentToClient.readable),
-    );
-
-    const clientConnection = new AgentSideConnection(
       () => new TestAgent(),
-      ndJsonStream(agentToClient.writable, clientToAgent.readable),
     );
 
     // Test agent calling client extension method
@@ -657,8 +674,8 @@ describe("Connection", () => {
       info: "agent notification",
     });
 
-    // Wait a bit for async handlers
-    await new Promise((resolve) => setTimeout(resolve, 50));
+    // Wait for both handlers to run
+    await Promise.all([clientNotification, agentNotification]);
 
     // Verify notifications were logged
     expect(extensionLog).toContain(
@@ -722,14 +739,9 @@ describe("Connection", () => {
     }
 
     // Set up connections
-    const agentConnection = new ClientSideConnection(
+    const { agentConnection, clientConnection } = connect(
       () => new TestClientWithoutExtensions(),
-      ndJsonStream(clientToAgent.writable, agentToClient.readable),
-    );
-
-    const clientConnection = new AgentSideConnection(
       () => new TestAgentWithoutExtensions(),
-      ndJsonStream(agentToClient.writable, clientToAgent.readable),
     );
 
     // Test that calling extension methods on connections without them throws method not found
@@ -849,14 +861,9 @@ describe("Connection", () => {
     }
 
     // Set up connections
-    const agentConnection = new ClientSideConnection(
+    const { agentConnection, clientConnection } = connect(
       () => new TestClient(),
-      ndJsonStream(clientToAgent.writable, agentToClient.readable),
-    );
-
-    const clientConnection = new AgentSideConnection(
       () => new TestAgent(),
-      ndJsonStream(agentToClient.writable, clientToAgent.readable),
     );
 
     // Test writeTextFile returns response with _meta
@@ -925,4 +932,122 @@ describe("Connection", () => {
     });
     expect(loadResponse).toEqual({});
   });
+
+  it("rejects requests whose message cannot be written", async () => {
+    class TestClient implements Client {
+      async writeTextFile(
+        _: WriteTextFileRequest,
+      ): Promise<WriteTextFileResponse> {
+        return {};
+      }
+      async readTextFile(
+        _: ReadTextFileRequest,
+      ): Promise<ReadTextFileResponse> {
+        return { content: "" };
+      }
+      async requestPermission(
+        _: RequestPermissionRequest,
+      ): Promise<RequestPermissionResponse> {
+        return { outcome: { outcome: "cancelled" } };
+      }
+      async sessionUpdate(_: SessionNotification): Promise<void> {
+        // no-op
+      }
+    }
+
+    let responses!: ReadableStreamDefaultController<AnyMessage>;
+    const stream = {
+      readable: new ReadableStream<AnyMessage>({
+        start(controller) {
+          responses = controller;
+        },
+      }),
+      writable: new WritableStream<AnyMessage>({
+        write() {
+          throw new Error("Connection lost");
+        },
+      }),
+    };
+
+    const consoleError = vi
+      .spyOn(console, "error")
+      .mockImplementation(() => {});
+    try {
+      const agentConnection = new ClientSideConnection(
+        () => new TestClient(),
+        stream,
+      );
+
+      // The request fails instead of waiting for a response that can't arrive
+      await expect(
+        agentConnection.initialize({
+          protocolVersion: PROTOCOL_VERSION,
+          clientCapabilities: {
+            fs: {
+              readTextFile: false,
+              writeTextFile: false,
+            },
+          },
+        }),
+      ).rejects.toMatchObject({ code: -32603 });
+
+      // A late response with the same id no longer matches a pending request
+      const unknownResponse = new Promise<void>((resolve) => {
+        consoleError.mockImplementation((message) => {
+          if (message === "Got response to unknown request") {
+            resolve();
+          }
+        });
+      });
+      responses.enqueue({ jsonrpc: "2.0", id: 0, result: {} });
+      await unknownResponse;
+    } finally {
+      consoleError.mockRestore();
+    }
+  });
+});
+
+describe("ndJsonStream", () => {
+  it("parses messages split across arbitrary chunk boundaries", async () => {
+    const messages: AnyMessage[] = [
+      {
+        jsonrpc: "2.0",
+        method: "session/update",
+        params: { text: "héllo wörld 👋" },
+      },
+      { jsonrpc: "2.0", id: 1, result: { content: "日本語のテキスト" } },
+      { jsonrpc: "2.0", id: 2, method: "fs/read_text_file", params: {} },
+    ];
+    const [first, second, third] = messages.map((message) =>
+      JSON.stringify(message),
+    );
+    // Include blank and whitespace-only lines, which should be skipped
+    const bytes = new TextEncoder().encode(
+      `${first}\n\n${second}\n  \n${third}\n`,
+    );
+
+    for (const chunkSize of [1, 2, 3, 7, 64, bytes.length]) {
+      const input = new ReadableStream<Uint8Array>({
+        start(controller) {
+          for (let i = 0; i < bytes.length; i += chunkSize) {
+            controller.enqueue(bytes.slice(i, i + chunkSize));
+          }
+          controller.close();
+        },
+      });
+      const stream = ndJsonStream(new WritableStream(), input);
+
+      const received: AnyMessage[] = [];
+      const reader = stream.readable.getReader();
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+          break;
+        }
+        received.push(value);
+      }
+
+      expect(received).toEqual(messages);
+    }
+  });
 });
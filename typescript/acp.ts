@@ -695,7 +695,6 @@ class Connection {
   #requestHandler: RequestHandler;
   #notificationHandler: NotificationHandler;
   #stream: Stream;
-  #writeQueue: Promise<void> = Promise.resolve();
 
   constructor(
     requestHandler: RequestHandler,
@@ -720,9 +719,9 @@ class Connection {
           continue;
         }
 
-        try {
-          this.#processMessage(message);
-        } catch (err) {
+        // Messages are processed concurrently, so failures surface as a
+        // rejected promise rather than a synchronous throw.
+        this.#processMessage(message).catch((err) => {
           console.error(
             "Unexpected error during message processing:",
             message,
@@ -739,7 +738,7 @@ class Connection {
               },
             });
           }
-        }
+        });
       }
     } finally {
       reader.releaseLock();
@@ -876,7 +875,11 @@ class Connection {
     const responsePromise = new Promise((resolve, reject) => {
       this.#pendingResponses.set(id, { resolve, reject });
     });
-    await this.#sendMessage({ jsonrpc: "2.0", id, method, params });
+    if (!(await this.#sendMessage({ jsonrpc: "2.0", id, method, params }))) {
+      // The request never reached the peer, so no response will arrive.
+      this.#pendingResponses.delete(id);
+      throw RequestError.internalError({ details: "failed to send request" });
+    }
     return responsePromise as Promise<Resp>;
   }
 
@@ -884,21 +887,21 @@ class Connection {
     await this.#sendMessage({ jsonrpc: "2.0", method, params });
   }
 
-  async #sendMessage(message: AnyMessage) {
-    this.#writeQueue = this.#writeQueue
-      .then(async () => {
-        const writer = this.#stream.writable.getWriter();
-        try {
-          await writer.write(message);
-        } finally {
-          writer.releaseLock();
-        }
-      })
-      .catch((error) => {
-        // Continue processing writes on error
-        console.error("ACP write error:", error);
-      });
-    return this.#writeQueue;
+  async #sendMessage(message: AnyMessage): Promise<boolean> {
+    // Only hold the writer lock while queueing the message, so the stream
+    // can still be closed or aborted by its owner. The stream completes
+    // queued writes in call order after the lock is released.
+    try {
+      const writer = this.#stream.writable.getWriter();
+      const written = writer.write(message);
+      writer.releaseLock();
+      await written;
+      return true;
+    } catch (error) {
+      // Once the stream has errored, every later write fails as well.
+      console.error("ACP write error:", error);
+      return false;
+    }
   }
 }
 
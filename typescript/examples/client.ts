@@ -19,26 +19,30 @@ class ExampleClient implements acp.Client {
       console.log(`   ${index + 1}. ${option.name} (${option.kind})`);
     });
 
-    while (true) {
-      const rl = readline.createInterface({
-        input: process.stdin,
-        output: process.stdout,
-      });
-
-      let answer = await rl.question("\nChoose an option: ");
-      const trimmedAnswer = answer.trim();
-
-      const optionIndex = parseInt(trimmedAnswer) - 1;
-      if (optionIndex >= 0 && optionIndex < params.options.length) {
-        return {
-          outcome: {
-            outcome: "selected",
-            optionId: params.options[optionIndex].optionId,
-          },
-        };
-      } else {
-        console.log("Invalid option. Please try again.");
+    const rl = readline.createInterface({
+      input: process.stdin,
+      output: process.stdout,
+    });
+
+    try {
+      while (true) {
+        const answer = await rl.question("\nChoose an option: ");
+        const trimmedAnswer = answer.trim();
+
+        const optionIndex = parseInt(trimmedAnswer) - 1;
+        if (optionIndex >= 0 && optionIndex < params.options.length) {
+          return {
+            outcome: {
+              outcome: "selected",
+              optionId: params.options[optionIndex].optionId,
+            },
+          };
+        } else {
+          console.log("Invalid option. Please try again.");
+        }
       }
+    } finally {
+      rl.close();
     }
   }
 
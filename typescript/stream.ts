@@ -43,12 +43,14 @@ export function ndJsonStream(
           if (!value) {
             continue;
           }
-          content += textDecoder.decode(value, { stream: true });
-          const lines = content.split("\n");
-          content = lines.pop() || "";
-
-          for (const line of lines) {
-            const trimmedLine = line.trim();
+          // Only scan the newly decoded chunk for line breaks, so a large
+          // message arriving in many chunks isn't re-split on every read.
+          const chunk = textDecoder.decode(value, { stream: true });
+          let start = 0;
+          let newline = chunk.indexOf("\n");
+          while (newline !== -1) {
+            const trimmedLine = (content + chunk.slice(start, newline)).trim();
+            content = "";
             if (trimmedLine) {
               try {
                 const message = JSON.parse(trimmedLine) as AnyMessage;
@@ -61,7 +63,10 @@ export function ndJsonStream(
                 );
               }
             }
+            start = newline + 1;
+            newline = chunk.indexOf("\n", start);
           }
+          content += chunk.slice(start);
         }
       } finally {
         reader.releaseLock();
@@ -73,12 +78,13 @@ export function ndJsonStream(
   const writable = new WritableStream<AnyMessage>({
     async write(message) {
       const content = JSON.stringify(message) + "\n";
+      // Release the lock as soon as the chunk is queued rather than after it
+      // has been written, so the output can still be closed or aborted by its
+      // owner.
       const writer = output.getWriter();
-      try {
-        await writer.write(textEncoder.encode(content));
-      } finally {
-        writer.releaseLock();
-      }
+      const written = writer.write(textEncoder.encode(content));
+      writer.releaseLock();
+      await written;
     },
   });
 